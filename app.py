@@ -1,7 +1,17 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+from core import (
+    build_mileage_png,
+    build_spend_png,
+    compute_dist_mileage,
+    compute_monthly,
+    convert_gsheet_to_csv_url,
+    GSHEET_URL_PREFIX,
+    load_data_from_gsheet,
+    to_csv_bytes,
+)
 SKIP_FIRST_MILEAGE = 2
+RAW_DATA_PREVIEW_ROWS = 100
 
 st.set_page_config(page_title="Fuel Log Analyzer", layout="wide")
 
@@ -9,27 +19,19 @@ st.title("🔍 Bike Fuel Log Analyzer")
 
 sheet_url = st.text_input("Enter Google Sheets link (view or edit link)", "")
 
-def convert_gsheet_to_csv_url(url: str) -> str:
-    # If URL is already export URL, just return
-    if "export?format=csv" in url:
-        return url
-    # Replace /edit#gid= or /edit?usp=... etc.
-    if "/edit" in url:
-        return url.split("/edit")[0] + "/export?format=csv" + ("&" + url.split("export?format=csv&")[-1] if "gid=" in url else "")
-    # If it has gid= but not edit
-    if "gid=" in url:
-        return url + "/export?format=csv"
-    # fallback (might fail)
-    return url
-
-def load_data_from_gsheet(url: str) -> pd.DataFrame:
-    csv_url = convert_gsheet_to_csv_url(url)
-    df = pd.read_csv(csv_url)
-    return df
-
 if sheet_url:
+    # Reject links that can't be a Google Sheet before any network fetch;
+    # Google redirects http to https, so upgrade the scheme up front
+    link = sheet_url.strip()
+    if link.startswith("http://"):
+        link = "https://" + link[len("http://"):]
+    if not link.startswith(GSHEET_URL_PREFIX):
+        st.error(f"That doesn't look like a Google Sheets link — expected a URL starting with {GSHEET_URL_PREFIX}")
+        st.stop()
+    csv_url = convert_gsheet_to_csv_url(link)
+
     try:
-        df = load_data_from_gsheet(sheet_url)
+        df = load_data_from_gsheet(csv_url)
 
         # Validate columns
         expected_cols = {"Date", "Odometer", "Fuel_Litres", "Amount_Spent"}
@@ -38,7 +40,7 @@ if sheet_url:
         else:
             total_litres = df["Fuel_Litres"].sum()
             total_spent = df["Amount_Spent"].sum()
-            total_distance = list(df["Odometer"])[-1]
+            total_distance = df["Odometer"].iat[-1]
             col1, col2, col3, col4 = st.columns(4)
             with col1:
                 st.metric(label="📍 Total Distance (km)", value=f"{total_distance:,.2f}")
@@ -47,48 +49,40 @@ if sheet_url:
             with col3:
                 st.metric(label="💰 Total Spent", value=f"₹ {total_spent:,.2f}")
 
-            # Parse date
-            df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m", errors="coerce")
+            # Parse date (cache=True is pandas' default, spelled out so repeated months stay deduped)
+            df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m", errors="coerce", cache=True)
             if df["Date"].isna().any():
                 st.warning("Some dates failed to parse — ensure Date column is in YYYY-MM format.")
 
-            # Compute Distance
-            df["Distance"] = df["Odometer"].diff().fillna(0)
-
-            # Compute Mileage kmpl, avoiding division by zero
-            df["Mileage_kmpl"] = df.apply(
-                lambda row: round(row["Distance"] / row["Fuel_Litres"], 2) if row["Fuel_Litres"] and row["Fuel_Litres"] != 0 else 0,
-                axis=1
-            )
+            # Compute Distance and Mileage kmpl, avoiding division by zero
+            odo = df["Odometer"].to_numpy(dtype=float)
+            fuel = df["Fuel_Litres"].to_numpy(dtype=float)
+            dist, mileage = compute_dist_mileage(odo, fuel)
+            df["Distance"] = dist
+            df["Mileage_kmpl"] = mileage
 
-            avg_mileage = sum(list(df["Mileage_kmpl"])[SKIP_FIRST_MILEAGE:]) / (len(df)-SKIP_FIRST_MILEAGE)
+            # Same arithmetic as before: NaN rows propagate and short logs raise ZeroDivisionError
+            avg_mileage = float(df["Mileage_kmpl"].iloc[SKIP_FIRST_MILEAGE:].sum(skipna=False)) / (len(df) - SKIP_FIRST_MILEAGE)
             with col4:
                 st.metric(label="⚡ Mileage (km/L)", value=f"{avg_mileage:,.2f}")
 
             st.subheader("📋 Raw Data")
-            st.dataframe(df)
+            if st.checkbox("Show full log"):
+                st.dataframe(df)
+            else:
+                st.dataframe(df.tail(RAW_DATA_PREVIEW_ROWS))
 
             # Month period
             df["Month"] = df["Date"].dt.to_period("M")
 
             # Monthly summary
-            monthly = df.groupby("Month").agg(
-                Total_Distance=("Distance", "sum"),
-                Total_Fuel_Litres=("Fuel_Litres", "sum"),
-                Total_Spent=("Amount_Spent", "sum"),
-                Avg_Mileage=("Mileage_kmpl", "mean"),
-                Best_Mileage=("Mileage_kmpl", "max"),
-                Worst_Mileage=("Mileage_kmpl", "min"),
-                Refills=("Fuel_Litres", "count"),
-            ).reset_index()
-
-            monthly["Overall_Mileage"] = (monthly["Total_Distance"] / monthly["Total_Fuel_Litres"]).round(2)
+            monthly = compute_monthly(df)
 
             st.subheader("📊 Monthly Summary")
             st.dataframe(monthly)
 
             # Download buttons
-            csv_details = df.to_csv(index=False).encode("utf-8")
+            csv_details = to_csv_bytes(df)
             st.download_button(
                 label="Download Detailed Log as CSV",
                 data=csv_details,
@@ -96,7 +90,7 @@ if sheet_url:
                 mime="text/csv"
             )
 
-            csv_monthly = monthly.to_csv(index=False).encode("utf-8")
+            csv_monthly = to_csv_bytes(monthly)
             st.download_button(
                 label="Download Monthly Summary CSV",
                 data=csv_monthly,
@@ -106,22 +100,11 @@ if sheet_url:
 
             # Plots
             st.subheader("📈 Mileage Trend")
-            fig1, ax1 = plt.subplots()
-            ax1.plot(monthly["Month"].astype(str), monthly["Overall_Mileage"], marker="o")
-            ax1.set_xlabel("Month")
-            ax1.set_ylabel("Mileage (km/l)")
-            ax1.set_title("Overall Monthly Mileage")
-            ax1.grid(True)
-            st.pyplot(fig1)
+            months = tuple(monthly["Month"].astype(str))
+            st.image(build_mileage_png(months, tuple(monthly["Overall_Mileage"])), width="stretch")
 
             st.subheader("💰 Spending Trend")
-            fig2, ax2 = plt.subplots()
-            ax2.bar(monthly["Month"].astype(str), monthly["Total_Spent"])
-            ax2.set_xlabel("Month")
-            ax2.set_ylabel("Total Spent (₹)")
-            ax2.set_title("Monthly Fuel Spend")
-            ax2.grid(True)
-            st.pyplot(fig2)
+            st.image(build_spend_png(months, tuple(monthly["Total_Spent"])), width="stretch")
 
     except Exception as e:
         st.error(f"Failed to load or process data: {e}")
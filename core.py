@@ -0,0 +1,143 @@
+import io
+import re
+import streamlit as st
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+GSHEET_URL_PREFIX = "https://docs.google.com/spreadsheets/"
+# "/d/e/..." is a publish-to-web link, not a document id, so it is never rewritten.
+# Multi-account links carry a "u/<n>/" segment that is kept in the export URL.
+_GSHEET_RE = re.compile(r"/spreadsheets/((?:u/\d+/)?)d/(?!e/)([^/?#]+)(?:.*?[#?&]gid=(\d+))?")
+
+def convert_gsheet_to_csv_url(url: str) -> str:
+    # If URL is already export URL, just return
+    if "export?format=csv" in url:
+        return url
+    # Pull the document id and optional sheet gid out of any view/edit link
+    m = _GSHEET_RE.search(url)
+    if m is None:
+        # fallback (might fail)
+        return url
+    account, doc_id, gid = m.groups()
+    csv_url = f"{GSHEET_URL_PREFIX}{account}d/{doc_id}/export?format=csv"
+    return csv_url + (f"&gid={gid}" if gid else "")
+
+def compute_dist_mileage(odo: np.ndarray, fuel: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    dist = np.empty_like(odo)
+    dist[:1] = 0.0
+    np.subtract(odo[1:], odo[:-1], out=dist[1:])
+    # Match fillna(0): zero NaN gaps only, leave inf alone
+    np.copyto(dist, 0.0, where=np.isnan(dist))
+    mileage = np.zeros_like(fuel)
+    np.divide(dist, fuel, out=mileage, where=fuel != 0)
+    np.round(mileage, 2, out=mileage)
+    return dist, mileage
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_data_from_gsheet(csv_url: str) -> pd.DataFrame:
+    # Expects an already converted URL from convert_gsheet_to_csv_url
+    df = pd.read_csv(csv_url)
+    return df
+
+# (column, reducer) -> summary column name, in display order
+MONTHLY_COLUMNS = {
+    ("Distance", "sum"): "Total_Distance",
+    ("Fuel_Litres", "sum"): "Total_Fuel_Litres",
+    ("Amount_Spent", "sum"): "Total_Spent",
+    ("Mileage_kmpl", "mean"): "Avg_Mileage",
+    ("Mileage_kmpl", "max"): "Best_Mileage",
+    ("Mileage_kmpl", "min"): "Worst_Mileage",
+    ("Fuel_Litres", "count"): "Refills",
+}
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def compute_monthly(df: pd.DataFrame) -> pd.DataFrame:
+    # Logs are appended in date order, so skip the grouper sort and fix up afterwards
+    monthly = df.groupby("Month", sort=False, observed=True).agg({
+        "Distance": "sum",
+        "Fuel_Litres": ["sum", "count"],
+        "Amount_Spent": "sum",
+        "Mileage_kmpl": ["mean", "max", "min"],
+    })
+    monthly.columns = [MONTHLY_COLUMNS[col] for col in monthly.columns]
+    monthly = monthly[list(MONTHLY_COLUMNS.values())].reset_index().sort_values("Month", ignore_index=True)
+
+    monthly["Overall_Mileage"] = (monthly["Total_Distance"] / monthly["Total_Fuel_Litres"].replace(0, np.nan)).round(2)
+    return monthly
+
+_CSV_SPECIAL_CHARS = re.compile(r'[",\r\n]')
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    # pandas quotes a row that is a single empty field, Arrow writes a blank line
+    if len(df.columns) == 1:
+        return df.to_csv(index=False).encode("utf-8")
+
+    # Arrow can't write periods, prints datetimes with nanoseconds and writes
+    # bools lowercase, so render those as text the way to_csv would
+    text_cols = {}
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values) or pd.api.types.infer_dtype(values, skipna=True) == "boolean":
+            text_cols[col] = values.map({True: "True", False: "False"})
+        elif isinstance(values.dtype, pd.PeriodDtype):
+            text_cols[col] = values.astype(str).where(values.notna(), None)
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            valid = values.dropna()
+            fmt = "%Y-%m-%d" if (valid.dt.normalize() == valid).all() else "%Y-%m-%d %H:%M:%S"
+            text_cols[col] = values.dt.strftime(fmt)
+    if text_cols:
+        df = df.assign(**{str(col): vals for col, vals in text_cols.items()})
+
+    names = [str(col) for col in df.columns]
+    if any(_CSV_SPECIAL_CHARS.search(name) for name in names):
+        return df.to_csv(index=False).encode("utf-8")
+    buf = io.BytesIO()
+    buf.write((",".join(names) + "\n").encode("utf-8"))
+    try:
+        # Unquoted output like to_csv; Arrow refuses values that would need quotes
+        pacsv.write_csv(
+            pa.Table.from_pandas(df, preserve_index=False),
+            buf,
+            pacsv.WriteOptions(include_header=False, quoting_style="none"),
+        )
+    except pa.ArrowInvalid:
+        return df.to_csv(index=False).encode("utf-8")
+    return buf.getvalue()
+
+def _fig_to_png(fig) -> bytes:
+    # Same savefig options st.pyplot uses
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=200)
+    return buf.getvalue()
+
+# Figures are built per call with matplotlib.figure.Figure (no shared pyplot
+# state) and only the PNG bytes are cached, so sessions never share a Figure.
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_mileage_png(months: tuple, mileage: tuple) -> bytes:
+    # Imported lazily so URL/schema error reruns never pay for matplotlib
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot(months, mileage, marker="o")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Mileage (km/l)")
+    ax.set_title("Overall Monthly Mileage")
+    ax.grid(True)
+    return _fig_to_png(fig)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_spend_png(months: tuple, spent: tuple) -> bytes:
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(months, spent)
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Total Spent (₹)")
+    ax.set_title("Monthly Fuel Spend")
+    ax.grid(True)
+    return _fig_to_png(fig)